@@ -1,12 +1,17 @@
 import os
 import re
 import json
+import functools
+import queue
 import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import messagebox
 from difflib import SequenceMatcher
 
 import gspread
+from gspread.utils import absolute_range_name, rowcol_to_a1
 from oauth2client.service_account import ServiceAccountCredentials
 
 
@@ -22,7 +27,14 @@ SCOPE = [
 # Do NOT commit the JSON file. Add it to .gitignore.
 DEFAULT_SERVICE_ACCOUNT_PATH = "service_account.json"
 
+# Survey header that holds each participant's identifier
+ID_HEADER = "Personal Identifier:"
 
+# The first 36 master questions come from the pre-survey, the rest from the post-survey
+PRE_QUESTION_COUNT = 36
+
+
+@functools.lru_cache(maxsize=1)
 def load_service_account_dict() -> dict:
     path = os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON", DEFAULT_SERVICE_ACCOUNT_PATH)
     if not os.path.exists(path):
@@ -48,20 +60,34 @@ def authorize_client() -> gspread.Client:
     return gspread.authorize(creds)
 
 
+_WS_RE = re.compile(r"\s+")
+
+
+def _norm(text: str) -> str:
+    return _WS_RE.sub(" ", text.lower().replace("?", "").strip())
+
+
+def build_exact_header_index(norm_headers: list[str]) -> dict[str, int]:
+    # Maps normalized header -> 1-based column (first occurrence wins)
+    index = {}
+    for i, h in enumerate(norm_headers):
+        index.setdefault(h, i + 1)
+    return index
+
+
 def find_best_column(keyword: str, headers: list[str], fuzzy_cutoff: float = 0.6) -> int:
     # Returns 1-based column index, or -1 if no match
-    norm_q = re.sub(r"\s+", " ", keyword.lower().replace("?", "").strip())
+    # `headers` are expected to already be normalized with _norm()
+    norm_q = _norm(keyword)
 
     # First pass: simple substring match
-    for i, h in enumerate(headers):
-        norm_h = re.sub(r"\s+", " ", h.lower().replace("?", "").strip())
+    for i, norm_h in enumerate(headers):
         if norm_q in norm_h:
             return i + 1
 
     # Second pass: fuzzy match
     best_score, best_idx = 0.0, -1
-    for i, h in enumerate(headers):
-        norm_h = re.sub(r"\s+", " ", h.lower().replace("?", "").strip())
+    for i, norm_h in enumerate(headers):
         score = SequenceMatcher(None, norm_q, norm_h).ratio()
         if score > best_score:
             best_score, best_idx = score, i
@@ -76,17 +102,55 @@ pre_survey = None
 post_survey = None
 
 attendance_values = []
+attendance_values_lower = []
+attendance_counts = Counter()
 master_values = []
 pre_values = []
 post_values = []
 
+# Column-major copies of the sheets above: *_cols[c][r] == *_values[r][c]
+master_cols = []
+pre_cols = []
+post_cols = []
+
 pre_headers = []
 post_headers = []
+pre_headers_norm = []
+post_headers_norm = []
+pre_header_exact = {}
+post_header_exact = {}
 questions = []
+# positions in `questions` that ask for a free-text "write one word" answer
+one_word_questions = set()
+
+# question -> resolved 1-based column, built once per run in build_column_indexes()
+pre_col_for_question = {}
+post_col_for_question = {}
+
+# identifier (lowercased) -> 1-based row in pre_values / post_values
+pre_id_index = {}
+post_id_index = {}
+
+
+def to_columns(rows: list[list[str]]) -> list[list[str]]:
+    # Transposes a sheet, padding short rows with ""
+    width = max(map(len, rows), default=0)
+    return [[(r[c] if c < len(r) else "") for r in rows] for c in range(width)]
+
+
+def row_values_from(values: list[list[str]], row: int) -> list[str]:
+    # Same as Worksheet.row_values(row) but read from already-fetched values
+    if len(values) < row:
+        return []
+    out = list(values[row - 1])
+    while out and out[-1] == "":
+        out.pop()
+    return out
 
 
 def get_names() -> list[str]:
-    names = master_sheet.col_values(1)
+    # master headers are on row 4, data starts at row 5
+    names = master_cols[0][4:] if master_cols else []
     return [n for n in names if n and n != "Identifier"]
 
 
@@ -104,30 +168,27 @@ def find_post_column(keyword: str) -> int:
     return -1
 
 
+def build_id_index(columns: list[list[str]], col: int) -> dict[str, int]:
+    # Maps lowercased identifier -> 1-based row (first occurrence wins)
+    index = {}
+    if col == -1 or col > len(columns):
+        return index
+    for i, value in enumerate(columns[col - 1]):
+        if value:
+            index.setdefault(value.lower(), i + 1)
+    return index
+
+
 def find_pre_row_by_id(identifier: str) -> int:
-    col = find_pre_column("Personal Identifier:")
-    if col == -1:
-        return -1
-    column_values = [row[col - 1] if len(row) >= col else "" for row in pre_values]
-    for i, value in enumerate(column_values):
-        if value.lower() == identifier.lower():
-            return i + 1
-    return -1
+    return pre_id_index.get(identifier.lower(), -1)
 
 
 def find_post_row_by_id(identifier: str) -> int:
-    col = find_post_column("Personal Identifier:")
-    if col == -1:
-        return -1
-    column_values = [row[col - 1] if len(row) >= col else "" for row in post_values]
-    for i, value in enumerate(column_values):
-        if value.lower() == identifier.lower():
-            return i + 1
-    return -1
+    return post_id_index.get(identifier.lower(), -1)
 
 
 def get_questions_from_master() -> list[str]:
-    header_row = master_sheet.row_values(4)
+    header_row = row_values_from(master_values, 4)
     out = []
     for header in header_row:
         question = header.split("\n")[0]
@@ -136,22 +197,54 @@ def get_questions_from_master() -> list[str]:
     return out
 
 
-def compile_post_response(row: int, question: str) -> str:
+def resolve_post_column(question: str) -> int:
+    # Fast path: a header that matches exactly once normalized
+    col = post_header_exact.get(_norm(question))
+    if col is not None:
+        return col
     col = find_post_column(question)
     if col == -1:
-        col = find_best_column(question, post_headers, fuzzy_cutoff=0.35)
+        col = find_best_column(question, post_headers_norm, fuzzy_cutoff=0.35)
+    return col
+
+
+def resolve_pre_column(question: str) -> int:
+    # Fast path: a header that matches exactly once normalized
+    col = pre_header_exact.get(_norm(question))
+    if col is not None:
+        return col
+    col = find_pre_column(question)
+    if col == -1:
+        col = find_best_column(question, pre_headers_norm, fuzzy_cutoff=0.35)
+    return col
+
+
+def build_column_indexes():
+    # Pre questions only ever read the pre-survey and post questions the post-survey,
+    # so each survey only needs its own slice resolved
+    pre_col_for_question.clear()
+    post_col_for_question.clear()
+    pre_col_for_question[ID_HEADER] = find_pre_column(ID_HEADER)
+    post_col_for_question[ID_HEADER] = find_post_column(ID_HEADER)
+    for idx, q in enumerate(questions):
+        if idx >= PRE_QUESTION_COUNT:
+            post_col_for_question[q] = resolve_post_column(q)
+        else:
+            pre_col_for_question[q] = resolve_pre_column(q)
+
+
+def compile_post_response(row: int, question: str) -> str:
+    col = post_col_for_question.get(question, -1)
     if col == -1 or row == -1:
         return "ERROR"
-    return post_values[row - 1][col - 1]
+    return post_cols[col - 1][row - 1]
 
 
 def compile_pre_response(row: int, question: str) -> str:
-    col = find_pre_column(question)
-    if col == -1:
-        col = find_best_column(question, pre_headers, fuzzy_cutoff=0.35)
+    col = pre_col_for_question.get(question, -1)
     if col == -1 or row == -1:
         return "ERROR"
-    return pre_values[row - 1][col - 1]
+    return pre_cols[col - 1][row - 1]
 
 
 def filter_responses(responses: list[str]) -> list[str]:
@@ -170,13 +263,9 @@ def compile_responses(identifier: str) -> list[str]:
     post_row = find_post_row_by_id(identifier)
 
     responses = []
-    post_triggered = False
 
-    for q in questions:
-        if not post_triggered and questions.index(q) >= 36:
-            post_triggered = True
-
-        if post_triggered:
+    for idx, q in enumerate(questions):
+        if idx >= PRE_QUESTION_COUNT:
             responses.append(compile_post_response(post_row, q))
         else:
             responses.append(compile_pre_response(pre_row, q))
@@ -184,124 +273,140 @@ def compile_responses(identifier: str) -> list[str]:
     return filter_responses(responses)
 
 
-def response_to_number_helper(response: str, responses: list[str]):
-    if response is None:
+# Lowercased survey answer -> numeric code written to the master sheet
+_RESPONSE_TO_NUMBER = {
+    "pgy1": 0,
+    "pgy2": 1,
+    "pgy3": 2,
+
+    "20-25": 0,
+    "26-32": 1,
+    "33-40": 2,
+    "41+": 3,
+
+    "single/non partnered": 0,
+    "married/partnered": 1,
+
+    "man": 0,
+    "woman": 1,
+    "transgender": 2,
+    "non-binary, gender non-conforming, or genderqueer": 3,
+    "preferred response not listed": 4,
+
+    "allergy & immunology": 0,
+    "cardiology": 1,
+    "endocrinology": 2,
+    "geriatrics": 3,
+    "gi": 4,
+    "heme/onc": 5,
+    "hospital medicine": 6,
+    "infectious disease": 7,
+    "nephrology": 8,
+    "palliative care": 9,
+    "pulm/crit": 10,
+    "primary care": 11,
+    "rheumatology": 12,
+    "i don't plan to practice": 13,
+    "undecided": 14,
+
+    "ccu": 0,
+    "ed": 1,
+    "elective": 2,
+    "elmhurst": 3,
+    "micu": 4,
+    "nights": 5,
+    "sinai floors": 6,
+    "senior role": 7,
+    "va floors": 8,
+    "va icu": 9,
+
+    "no": 0,
+    "yes": 1,
+
+    "strongly disagree": 0,
+    "disagree": 1,
+    "neutral": 2,
+    "agree": 3,
+    "strongly agree": 4,
+
+    "not at all": 0,
+    "somewhat true": 1,
+    "moderately true": 2,
+    "very true": 3,
+    "completely true": 4,
+
+    "very little": 1,
+    "moderately": 2,
+    "a lot": 3,
+    "extremely": 4,
+
+    "i feel completely burned out": 0,
+    "my symptoms of burnout won't go away. i think about work frustrations a lot.": 1,
+    "i am definitely burning out and have more than one symptom of burnout, e.g. emotional exhaustion and depersonalization.": 2,
+    "i am very stressed and may be suffering some burnout symptoms, such as emotional exhaustion or depersonalization.": 3,
+    "i am under stress, and don't always have as much energy as i did, but i don't feel burned out.": 4,
+    "i enjoy my work. i have no symptoms of burnout.": 5,
+
+    "not of interest to me": 0,
+    "too busy with clinical duties": 1,
+    "too busy with admin": 2,
+    "too busy with other stuff": 3,
+    "i like to keep my lunch hour free": 4,
+    "n/a--i have attended all of them": 5,
+
+    "narrative medicine faculty from columbia university (current facilitators)": 0,
+    "mount sinai faculty with experience/interest in narrative medicine": 1,
+    "mount sinai residents with experience/interest in narrative medicine": 2,
+
+    "only pgy1's": 0,
+    "pgy1's, pgy2's, and pgy3's": 1,
+    "only pgy1s": 0,
+    "pgy1s, pgy2s, and pgy3s": 1,
+
+    "close reading and discussion": 0,
+    "writing exercise and discussion": 1,
+    "n/a--have not attended": 2,
+    "n/a - did not attend": 5,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _lookup_response(response: str) -> int | str | None:
+    # Position-independent part of the conversion; answers repeat heavily across users.
+    # Returns the numeric code, "" for a blank answer, or None if unrecognized.
+    r = response.lower().strip()
+    num = _RESPONSE_TO_NUMBER.get(r)
+    if num is not None:
+        return num
+    if r == "":
         return ""
+    return None
 
-    r = response.lower().strip()
 
-    match r:
-        case "pgy1": return 0
-        case "pgy2": return 1
-        case "pgy3": return 2
-
-        case "20-25": return 0
-        case "26-32": return 1
-        case "33-40": return 2
-        case "41+": return 3
-
-        case "single/non partnered": return 0
-        case "married/partnered": return 1
-
-        case "man": return 0
-        case "woman": return 1
-        case "transgender": return 2
-        case "non-binary, gender non-conforming, or genderqueer": return 3
-        case "preferred response not listed": return 4
-
-        case "allergy & immunology": return 0
-        case "cardiology": return 1
-        case "endocrinology": return 2
-        case "geriatrics": return 3
-        case "gi": return 4
-        case "heme/onc": return 5
-        case "hospital medicine": return 6
-        case "infectious disease": return 7
-        case "nephrology": return 8
-        case "palliative care": return 9
-        case "pulm/crit": return 10
-        case "primary care": return 11
-        case "rheumatology": return 12
-        case "i don't plan to practice": return 13
-        case "undecided": return 14
-
-        case "ccu": return 0
-        case "ed": return 1
-        case "elective": return 2
-        case "elmhurst": return 3
-        case "micu": return 4
-        case "nights": return 5
-        case "sinai floors": return 6
-        case "senior role": return 7
-        case "va floors": return 8
-        case "va icu": return 9
-
-        case "no": return 0
-        case "yes": return 1
-
-        case "strongly disagree": return 0
-        case "disagree": return 1
-        case "neutral": return 2
-        case "agree": return 3
-        case "strongly agree": return 4
-
-        case "not at all": return 0
-        case "somewhat true": return 1
-        case "moderately true": return 2
-        case "very true": return 3
-        case "completely true": return 4
-
-        case "very little": return 1
-        case "moderately": return 2
-        case "a lot": return 3
-        case "extremely": return 4
-
-        case "i feel completely burned out": return 0
-        case "my symptoms of burnout won't go away. i think about work frustrations a lot.": return 1
-        case "i am definitely burning out and have more than one symptom of burnout, e.g. emotional exhaustion and depersonalization.": return 2
-        case "i am very stressed and may be suffering some burnout symptoms, such as emotional exhaustion or depersonalization.": return 3
-        case "i am under stress, and don't always have as much energy as i did, but i don't feel burned out.": return 4
-        case "i enjoy my work. i have no symptoms of burnout.": return 5
-
-        case "not of interest to me": return 0
-        case "too busy with clinical duties": return 1
-        case "too busy with admin": return 2
-        case "too busy with other stuff": return 3
-        case "i like to keep my lunch hour free": return 4
-        case "n/a--i have attended all of them": return 5
-
-        case "narrative medicine faculty from columbia university (current facilitators)": return 0
-        case "mount sinai faculty with experience/interest in narrative medicine": return 1
-        case "mount sinai residents with experience/interest in narrative medicine": return 2
-
-        case "only pgy1's": return 0
-        case "pgy1's, pgy2's, and pgy3's": return 1
-        case "only pgy1s": return 0
-        case "pgy1s, pgy2s, and pgy3s": return 1
-
-        case "close reading and discussion": return 0
-        case "writing exercise and discussion": return 1
-        case "n/a--have not attended": return 2
-        case "n/a - did not attend": return 5
+def response_to_number_helper(response: str, one_word: bool = False):
+    if response is None:
+        return ""
+
+    value = _lookup_response(response)
+    if value is not None:
+        return value
 
     # Free-text "one word" response: return the text as-is (lowercased)
-    if r == "" or r == " ":
-        return ""
-    if r in [x.lower() for x in responses]:
-        idx = [x.lower() for x in responses].index(r)
-        if "write one word" in questions[idx].lower():
-            return r
+    if one_word and response != "ERROR":
+        return response.lower().strip()
 
     return "ERROR"
 
 
 def response_to_number(responses: list[str]) -> list:
-    return [response_to_number_helper(r, responses) for r in responses]
+    return [
+        response_to_number_helper(r, i in one_word_questions)
+        for i, r in enumerate(responses)
+    ]
 
 
 def count_attendance(identifier: str) -> int:
-    ident = identifier.lower()
-    return sum(1 for v in attendance_values if v.lower() == ident)
+    return attendance_counts.get(identifier.lower(), 0)
 
 
 def get_user_numbers(identifier: str) -> list:
@@ -310,76 +415,179 @@ def get_user_numbers(identifier: str) -> list:
     return [count_attendance(identifier)] + nums
 
 
+def compute_all_user_numbers(names: list[str]) -> list[list]:
+    # Everything is in memory by now and each user is a handful of dict lookups,
+    # so a plain loop beats paying thread/process startup and pickling costs
+    return [get_user_numbers(name) for name in names]
+
+
 def identifier_getter() -> list[str]:
     identities = []
-    for v in attendance_values:
-        lv = v.lower()
-        if lv not in identities and "first two letters" not in lv:
+    seen = set()
+    for lv in attendance_values_lower:
+        if lv not in seen and "first two letters" not in lv:
+            seen.add(lv)
             identities.append(lv)
     return identities
 
 
 def write_identities():
     identities = identifier_getter()
-    from gspread.utils import rowcol_to_a1
 
     start_a1 = rowcol_to_a1(5, 1)
     end_a1 = rowcol_to_a1(len(identities) + 4, 1)
     master_sheet.update(f"{start_a1}:{end_a1}", [[i] for i in identities])
 
+    # Mirror the write into master_values so we don't have to re-fetch the sheet
+    width = max((len(row) for row in master_values), default=1) or 1
+    for i, ident in enumerate(identities):
+        r = i + 4
+        while len(master_values) <= r:
+            master_values.append([""] * width)
+        if master_values[r]:
+            master_values[r][0] = ident
+        else:
+            master_values[r] = [ident] + [""] * (width - 1)
 
-def write_user_numbers(identifier: str, numbers: list):
-    first_col_values = [row[0] for row in master_values]
-    target_row = first_col_values.index(identifier) + 1
 
-    from gspread.utils import rowcol_to_a1
-    start_a1 = rowcol_to_a1(target_row, 2)
-    end_a1 = rowcol_to_a1(target_row, 2 + len(numbers) - 1)
+def _col_letters(col: int) -> str:
+    # 1-based column number -> A1 column letters, e.g. 28 -> "AB"
+    return rowcol_to_a1(1, col)[:-1]
 
-    master_sheet.update(f"{start_a1}:{end_a1}", [numbers])
 
+def build_master_row_index() -> dict[str, int]:
+    # Maps identifier -> 1-based master row (first occurrence wins)
+    index = {}
+    for i, value in enumerate(master_cols[0] if master_cols else []):
+        index.setdefault(value, i + 1)
+    return index
 
-def filter_names(names: list[str]) -> list[str]:
-    # Only process rows where column B is still blank
-    col_b = [row[1] if len(row) > 1 else "" for row in master_values]
-    out = []
-    for i, name in enumerate(names):
-        # master headers are on row 4, data starts at row 5 => offset by 4
-        if i + 4 < len(col_b) and not col_b[i + 4]:
-            out.append(name)
-    return out
 
+def write_all_user_numbers(updates: list[tuple[int, list]]):
+    # One batched request instead of one update() call per user
+    if not updates:
+        return
 
-def main_function(att_url: str, master_url: str, pre_url: str, post_url: str):
+    # Every row has the same width, so the column letters only need working out once
+    start_col = _col_letters(2)
+    end_cols = {}
+    data = []
+    for target_row, numbers in updates:
+        end_col = end_cols.get(len(numbers))
+        if end_col is None:
+            end_col = end_cols[len(numbers)] = _col_letters(2 + len(numbers) - 1)
+        data.append({
+            "range": absolute_range_name(
+                master_sheet.title, f"{start_col}{target_row}:{end_col}{target_row}"
+            ),
+            "values": [numbers],
+        })
+
+    master_sheet.spreadsheet.values_batch_update(
+        {"valueInputOption": "RAW", "data": data}
+    )
+
+
+def filter_names(names: list[str]) -> list[str]:
+    # Only process identifiers whose column B is still blank
+    # (master headers are on row 4, data starts at row 5)
+    if len(master_cols) < 2:
+        return names
+    already_done = {
+        ident.lower()
+        for ident, col_b in zip(master_cols[0][4:], master_cols[1][4:])
+        if col_b
+    }
+    return [n for n in names if n.lower() not in already_done]
+
+
+class Cancelled(Exception):
+    pass
+
+
+def main_function(
+    att_url: str,
+    master_url: str,
+    pre_url: str,
+    post_url: str,
+    on_progress=None,
+    cancel_event: threading.Event | None = None,
+):
+    def phase(message: str):
+        # Checked between phases; an in-flight API call can't be interrupted
+        if cancel_event is not None and cancel_event.is_set():
+            raise Cancelled()
+        if on_progress is not None:
+            on_progress(message)
+
+    _lookup_response.cache_clear()
+
+    phase("Authorizing...")
     client = authorize_client()
 
+    phase("Opening sheets...")
     global attendance_sheet, master_sheet, pre_survey, post_survey
-    attendance_sheet = client.open_by_url(att_url).sheet1
-    master_sheet = client.open_by_url(master_url).sheet1
-    pre_survey = client.open_by_url(pre_url).sheet1
-    post_survey = client.open_by_url(post_url).sheet1
+    # Open all four at once so a bad URL or missing permission fails before any data is fetched
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        attendance_sheet, master_sheet, pre_survey, post_survey = ex.map(
+            lambda url: client.open_by_url(url).sheet1,
+            [att_url, master_url, pre_url, post_url],
+        )
 
+    phase("Loading sheet data...")
     global attendance_values, master_values, pre_values, post_values
-    attendance_values = attendance_sheet.col_values(2)
-    master_values = master_sheet.get_all_values()
-    pre_values = pre_survey.get_all_values()
-    post_values = post_survey.get_all_values()
-
-    global pre_headers, post_headers, questions
-    pre_headers = pre_survey.row_values(1)
-    post_headers = post_survey.row_values(1)
+    global attendance_values_lower, attendance_counts
+    # The four sheets are independent, so fetch them concurrently
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        att_future = ex.submit(attendance_sheet.col_values, 2)
+        master_future = ex.submit(master_sheet.get_all_values)
+        pre_future = ex.submit(pre_survey.get_all_values)
+        post_future = ex.submit(post_survey.get_all_values)
+        attendance_values = att_future.result()
+        master_values = master_future.result()
+        pre_values = pre_future.result()
+        post_values = post_future.result()
+    attendance_values_lower = [v.lower() for v in attendance_values]
+    attendance_counts = Counter(v for v in attendance_values_lower if v)
+
+    global pre_cols, post_cols
+    pre_cols = to_columns(pre_values)
+    post_cols = to_columns(post_values)
+
+    phase("Matching survey columns...")
+    global pre_headers, post_headers, questions, one_word_questions
+    pre_headers = row_values_from(pre_values, 1)
+    post_headers = row_values_from(post_values, 1)
     questions = get_questions_from_master()
+    one_word_questions = {i for i, q in enumerate(questions) if "write one word" in q.lower()}
+
+    global pre_headers_norm, post_headers_norm, pre_header_exact, post_header_exact
+    pre_headers_norm = [_norm(h) for h in pre_headers]
+    post_headers_norm = [_norm(h) for h in post_headers]
+    pre_header_exact = build_exact_header_index(pre_headers_norm)
+    post_header_exact = build_exact_header_index(post_headers_norm)
+    build_column_indexes()
+
+    global pre_id_index, post_id_index
+    pre_id_index = build_id_index(pre_cols, pre_col_for_question[ID_HEADER])
+    post_id_index = build_id_index(post_cols, post_col_for_question[ID_HEADER])
 
     # If the master sheet doesn't have IDs filled in yet, seed from attendance
-    if len(master_sheet.cell(5, 1).value) < 2:
+    first_id = master_values[4][0] if len(master_values) > 4 and master_values[4] else ""
+    if len(first_id) < 2:
+        phase("Seeding identifiers from attendance...")
         write_identities()
-        # refresh after writing
-        master_values[:] = master_sheet.get_all_values()
+
+    global master_cols
+    master_cols = to_columns(master_values)
 
     names = filter_names(get_names())
-    for name in names:
-        nums = get_user_numbers(name)
-        write_user_numbers(name, nums)
+    phase(f"Processing {len(names)} participants...")
+    all_nums = compute_all_user_numbers(names)
+
+    phase("Writing results...")
+    row_for = build_master_row_index()
+    write_all_user_numbers([(row_for[name], nums) for name, nums in zip(names, all_nums)])
 
 
 def launch_gui():
@@ -402,29 +610,75 @@ def launch_gui():
 
     attendance_var, master_var, pre_var, post_var = vars_
 
-    run_btn = tk.Button(root, text="Run")
-    run_btn.grid(row=len(labels), columnspan=2, pady=10)
+    btn_frame = tk.Frame(root)
+    btn_frame.grid(row=len(labels), columnspan=2, pady=10)
+    run_btn = tk.Button(btn_frame, text="Run")
+    run_btn.pack(side=tk.LEFT, padx=6)
+    cancel_btn = tk.Button(btn_frame, text="Cancel", state=tk.DISABLED)
+    cancel_btn.pack(side=tk.LEFT, padx=6)
+
+    status_var = tk.StringVar(value="Idle.")
+    tk.Label(root, textvariable=status_var).grid(row=len(labels) + 1, columnspan=2, pady=(0, 10))
+
+    # Worker thread -> Tk main loop. Tk isn't thread-safe, so only drain_queue touches widgets.
+    events = queue.Queue()
+    cancel_event = threading.Event()
+
+    def drain_queue():
+        finished = False
+        try:
+            while True:
+                kind, payload = events.get_nowait()
+                if kind == "progress":
+                    status_var.set(payload)
+                    continue
+                finished = True
+                if kind == "done":
+                    status_var.set("Done.")
+                    messagebox.showinfo("Success", "Done.")
+                elif kind == "cancelled":
+                    status_var.set("Cancelled.")
+                else:
+                    status_var.set("Failed.")
+                    messagebox.showerror("Error", payload)
+        except queue.Empty:
+            pass
+
+        if finished:
+            run_btn.config(state=tk.NORMAL)
+            cancel_btn.config(state=tk.DISABLED)
+        else:
+            root.after(100, drain_queue)
 
     def run_clicked():
         run_btn.config(state=tk.DISABLED)
+        cancel_btn.config(state=tk.NORMAL)
+        cancel_event.clear()
+        urls = [v.get().strip() for v in (attendance_var, master_var, pre_var, post_var)]
 
         def task():
             try:
                 main_function(
-                    attendance_var.get().strip(),
-                    master_var.get().strip(),
-                    pre_var.get().strip(),
-                    post_var.get().strip(),
+                    *urls,
+                    on_progress=lambda msg: events.put(("progress", msg)),
+                    cancel_event=cancel_event,
                 )
-                messagebox.showinfo("Success", "Done.")
+                events.put(("done", None))
+            except Cancelled:
+                events.put(("cancelled", None))
             except Exception as e:
-                messagebox.showerror("Error", str(e))
-            finally:
-                run_btn.config(state=tk.NORMAL)
+                events.put(("error", str(e)))
 
         threading.Thread(target=task, daemon=True).start()
+        root.after(100, drain_queue)
+
+    def cancel_clicked():
+        cancel_event.set()
+        cancel_btn.config(state=tk.DISABLED)
+        status_var.set("Cancelling after the current step...")
 
     run_btn.config(command=run_clicked)
+    cancel_btn.config(command=cancel_clicked)
     root.mainloop()
 
 
@@ -0,0 +1,54 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+try:
+    import SurveyProcessor as sp
+except ImportError as e:  # gspread / oauth2client / tkinter not installed
+    sp = None
+    IMPORT_ERROR = str(e)
+else:
+    IMPORT_ERROR = ""
+
+
+@unittest.skipIf(sp is None, f"SurveyProcessor dependencies missing: {IMPORT_ERROR}")
+class FindBestColumnTests(unittest.TestCase):
+    HEADERS = [
+        "Timestamp",
+        "Personal Identifier:",
+        "Which specialty do you plan to pursue?",
+        "What rotation were you on during the session?",
+        "Please write one word to describe residency",
+    ]
+
+    def setUp(self):
+        self.norm = [sp._norm(h) for h in self.HEADERS]
+
+    def test_missing_question_resolves_to_minus_one(self):
+        col = sp.find_best_column(
+            "How often do you feel emotionally exhausted?", self.norm, fuzzy_cutoff=0.35
+        )
+        self.assertEqual(col, -1)
+
+    def test_unrelated_header_does_not_clear_cutoff(self):
+        col = sp.find_best_column(
+            "Please write one word to describe residency",
+            ["what rotation were you on during the session"],
+            fuzzy_cutoff=0.35,
+        )
+        self.assertEqual(col, -1)
+
+    def test_minor_wording_change_still_matches(self):
+        col = sp.find_best_column(
+            "Which specialty do you plan to practice?", self.norm, fuzzy_cutoff=0.35
+        )
+        self.assertEqual(col, 3)
+
+    def test_substring_match_wins(self):
+        self.assertEqual(sp.find_best_column("personal identifier", self.norm), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()